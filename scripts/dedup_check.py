@@ -6,6 +6,7 @@ dedup_check.py — 用编辑距离查询 internships.yaml 中的重复条目
   python3 dedup_check.py --company "示例科技" --title "AI工程师" --salary "20-30K" --location "北京" --jd "负责LLM开发..."
   python3 dedup_check.py --company "示例科技" --title "AI工程师"   # 只匹配公司+岗位
   python3 dedup_check.py --threshold 0.2                          # 调整相似度阈值（默认0.25）
+  python3 dedup_check.py --company "示例科技" --top 3              # 只输出最相似的 3 条
 
 输出：
   匹配到重复条目时，打印 index（在 internships 列表中的位置）和相似度分数，退出码 0
@@ -14,45 +15,127 @@ dedup_check.py — 用编辑距离查询 internships.yaml 中的重复条目
 
 import sys
 import argparse
+import heapq
 import yaml
 
-YAML_PATH = "/Users/okonfu/.openclaw/workspace/internships.yaml"
+try:  # libyaml C 后端，缺失时退回纯 Python 实现
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
 
+try:
+    from rapidfuzz import process as _rf_process
+    from rapidfuzz.distance import Levenshtein as _rf_lev
+except ImportError:  # 纯 Python 兜底
+    _rf_process = _rf_lev = None
 
-def edit_distance(a: str, b: str) -> int:
-    """标准 Levenshtein 编辑距离"""
-    a, b = a.lower(), b.lower()
-    m, n = len(a), len(b)
-    dp = list(range(n + 1))
-    for i in range(1, m + 1):
-        prev = dp[0]
-        dp[0] = i
-        for j in range(1, n + 1):
-            temp = dp[j]
-            if a[i - 1] == b[j - 1]:
-                dp[j] = prev
-            else:
-                dp[j] = 1 + min(prev, dp[j], dp[j - 1])
-            prev = temp
-    return dp[n]
+YAML_PATH = "/Users/okonfu/.openclaw/workspace/internships.yaml"
 
 
-def similarity(a: str, b: str) -> float:
-    """归一化相似度：0.0（完全不同）~ 1.0（完全相同）"""
+def _myers_distance(a: str, b: str, max_k: int | None = None) -> int:
+    """Myers/Hyyrö 位并行编辑距离：a 作为 pattern 压进一个整数位向量，
+    每处理 b 的一个字符只需常数次位运算（Python int 不限位宽，无需分块）。
+    给定 max_k 时，一旦可证明距离 > max_k 即返回 max_k + 1。"""
+    if len(a) > len(b):
+        a, b = b, a
+    m, n = len(a), len(b)
+    if m == 0:
+        return n
+    peq: dict[str, int] = {}
+    for i, c in enumerate(a):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    # 热循环里只做位运算：方法查找提到循环外；所有中间量都落在 mask 内，
+    # 用 mask ^ x 代替 ~x & mask，避免生成负的大整数
+    get = peq.get
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    # score - (n - j) > max_k  ⇔  score + j > n + max_k；无 max_k 时 score + j ≤ 2n 永不触发
+    limit = n + max_k if max_k is not None else 2 * n
+    vp, vn, score = mask, 0, m
+    for j, c in enumerate(b, 1):
+        eq = get(c, 0)
+        xv = eq | vn
+        xh = ((((eq & vp) + vp) & mask) ^ vp) | eq
+        hp = vn | (mask ^ (xh | vp))
+        hn = vp & xh
+        if hp & high:
+            score += 1
+        elif hn & high:
+            score -= 1
+        hp = ((hp << 1) | 1) & mask
+        hn = (hn << 1) & mask
+        vp = hn | (mask ^ (xv | hp))
+        vn = hp & xv
+        # 剩余每列最多让距离减 1，下界仍超出 → 提前放弃
+        if score + j > limit:
+            return max_k + 1
+    return score
+
+
+def edit_distance(a: str, b: str, max_k: int | None = None) -> int:
+    """标准 Levenshtein 编辑距离（装了 rapidfuzz 时走 C 实现），区分大小写，
+    调用方需自行预先小写。
+
+    max_k：只关心距离是否 ≤ max_k 时传入；超出时返回 max_k + 1（不保证精确值）。
+    """
+    if max_k is not None and abs(len(a) - len(b)) > max_k:
+        return max_k + 1
+    if _rf_lev is not None:
+        return _rf_lev.distance(a, b, score_cutoff=max_k)
+    return _myers_distance(a, b, max_k)
+
+
+def similarity(a: str, b: str, floor: float = 0.0) -> float:
+    """归一化相似度：0.0（完全不同）~ 1.0（完全相同）
+
+    floor > 0 时允许提前退出：若长度差或带截断的编辑距离已证明相似度 < floor，
+    直接返回 0.0，调用方据此淘汰即可，不再跑完整编辑距离。
+    剪掉的条目不会拿到一个贴着 floor 的假分数，未剪掉的分数与不设 floor 时一致。
+    """
     if not a and not b:
         return 1.0
     if not a or not b:
         return 0.0
     max_len = max(len(a), len(b))
-    return 1.0 - edit_distance(a, b) / max_len
+    if floor <= 0:
+        return 1.0 - edit_distance(a, b) / max_len
+    # 相似度 ≥ floor ⇔ 距离 ≤ (1 - floor)·max_len，超出的部分无需精确计算；
+    # 多放宽 1：乘积本应是整数时浮点可能略小（118.99… 截成 118），宁可少剪不可错剪。
+    # 长度差超出 max_k 时 edit_distance 按整数直接判掉，不再另比浮点长度比
+    max_k = int((1.0 - floor) * max_len) + 1
+    dist = edit_distance(a, b, max_k)
+    if dist > max_k:
+        return 0.0
+    return 1.0 - dist / max_len
+
 
+def field_value(entry: dict, key: str) -> str:
+    """取 entry 中参与比较的字段文本；jd 优先 jd_full，缺失时退回 jd_summary"""
+    if key == "jd":
+        return str(entry.get("jd_full", "") or entry.get("jd_summary", "") or "")
+    return str(entry.get(key, "") or "")
 
-def field_sim(entry: dict, key: str, query: str) -> float:
-    """取 entry 中某字段与 query 的相似度，字段不存在时返回 1.0（不参与判断）"""
+
+def field_sim(val: str, query: str, floor: float = 0.0) -> float:
+    """字段值与 query 的相似度，query 为空时返回 1.0（不参与判断）"""
     if not query:
         return 1.0
-    val = str(entry.get(key, "") or "")
-    return similarity(val, query)
+    return similarity(val, query, floor)
+
+
+def column_sims(values: list[str], query: str) -> list[float]:
+    """整列字段值与同一 query 的相似度，query 为空时全为 1.0（不参与判断）。
+    同一公司/地点常在多条里重复出现，每个不同的值只算一次；
+    装了 rapidfuzz 时整列在一次 C 调用内算完，不逐条回到解释器。"""
+    if not query:
+        return [1.0] * len(values)
+    uniq = list(dict.fromkeys(values))
+    if _rf_process is None:
+        sim_of = {v: similarity(v, query) for v in uniq}
+    else:
+        sim_of = {v: sim for v, sim, _ in _rf_process.extract(
+            query, uniq, scorer=_rf_lev.normalized_similarity, limit=None)}
+    return [sim_of[v] for v in values]
 
 
 def main():
@@ -64,12 +147,14 @@ def main():
     parser.add_argument("--jd",        default="", help="JD 文本（可传 jd_full 或 jd_summary）")
     parser.add_argument("--threshold", type=float, default=0.25,
                         help="各字段平均距离率阈值，低于此值视为重复（默认 0.25）")
+    parser.add_argument("--top",       type=int, default=0,
+                        help="只保留相似度最高的 N 条（默认 0 = 全部输出）")
     parser.add_argument("--yaml",      default=YAML_PATH, help="YAML 文件路径")
     args = parser.parse_args()
 
     try:
         with open(args.yaml, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
+            data = yaml.load(f, Loader=_Loader) or {}
     except FileNotFoundError:
         print(f"[dedup_check] 文件不存在: {args.yaml}", file=sys.stderr)
         sys.exit(2)
@@ -88,22 +173,63 @@ def main():
         "jd":       0.15,
     }
 
+    # 比较不区分大小写：query 和各字段文本都在这里一次性小写，后面不再重复
+    queries = {
+        "company":  args.company.lower(),
+        "title":    args.title.lower(),
+        "salary":   args.salary.lower(),
+        "location": args.location.lower(),
+        "jd":       args.jd.lower(),
+    }
+    texts = {key: [field_value(e, key).lower() for e in entries] for key in weights}
+
+    # 短字段按列批量打分；jd 文本长、代价高，留到逐条循环里按剩余预算剪枝
+    cols = {
+        key: column_sims(texts[key], queries[key])
+        for key in ("company", "title", "salary", "location")
+    }
+    # 每个字段一组 (权重, 预先算好的相似度列或 None, 文本列, query)，按权重表顺序；
+    # 行循环里只剩按下标取列表元素，不再逐行查 dict
+    fields = [(w, cols.get(key), texts[key], queries[key]) for key, w in weights.items()]
+
+    # --top N：小顶堆只留当前最好的 N 条 (score, -idx, dist_rate)，-idx 让同分时保留靠前的条目。
+    # 堆满后阈值收紧到第 N 名的距离率，后续条目的剪枝随之更早触发。
+    threshold = args.threshold
+    top: list[tuple[float, int, float]] = []
+
     results = []
-    for idx, entry in enumerate(entries):
-        jd_val = str(entry.get("jd_full", "") or entry.get("jd_summary", "") or "")
-        sims = {
-            "company":  field_sim(entry, "company",  args.company),
-            "title":    field_sim(entry, "title",    args.title),
-            "salary":   field_sim(entry, "salary",   args.salary),
-            "location": field_sim(entry, "location", args.location),
-            "jd":       similarity(jd_val, args.jd) if args.jd else 1.0,
-        }
-        # 加权平均相似度
-        score = sum(sims[k] * weights[k] for k in weights)
-        # 距离率 = 1 - score；低于阈值 → 重复
+    for idx in range(len(entries)):
+        # 逐字段累加；已损失的权重 lost 决定下一字段的最低相似度，
+        # 预算耗尽即可淘汰，不必再算后面（尤其是最贵的 jd）
+        score = lost = 0.0
+        for w, col, text, query in fields:
+            budget = threshold - lost
+            if budget <= 0:
+                break
+            if col is not None:
+                sim = col[idx]
+            else:
+                sim = field_sim(text[idx], query, 1.0 - budget / w)
+            score += sim * w
+            lost += (1.0 - sim) * w
+        # 距离率 = 1 - 加权平均相似度；低于阈值 → 重复
         dist_rate = 1.0 - score
-        if dist_rate < args.threshold:
-            results.append((idx, score, dist_rate, entry))
+        if dist_rate >= threshold:
+            continue
+        if args.top <= 0:
+            results.append((idx, score, dist_rate, entries[idx]))
+            continue
+        if len(top) < args.top:
+            heapq.heappush(top, (score, -idx, dist_rate))
+        else:
+            heapq.heappushpop(top, (score, -idx, dist_rate))
+        if len(top) == args.top:
+            threshold = min(args.threshold, 1.0 - top[0][0])
+
+    if top:
+        # 还原成按 index 排列，下面的稳定排序才会和全量模式一样同分按 index 先后
+        results = [(-neg_idx, score, dist_rate, entries[-neg_idx])
+                   for score, neg_idx, dist_rate in sorted(top, key=lambda t: -t[1])]
 
     if not results:
         print("[dedup_check] 未找到重复条目")
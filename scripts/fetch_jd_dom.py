@@ -16,6 +16,17 @@ from pathlib import Path
 
 import yaml
 
+try:  # orjson 更快；其 JSONDecodeError 是 json.JSONDecodeError 的子类，异常处理不变
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+try:  # libyaml C 后端，缺失时退回纯 Python 实现
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
 ROOT = Path('/Users/okonfu/.openclaw/workspace')
 OSASCRIPT = ROOT / 'skills/chrome-osascript-ops/scripts/chrome_osascript.py'
 
@@ -70,7 +81,7 @@ def run(cmd: list) -> dict:
     if not out:
         return {'ok': False, 'error': (p.stderr or 'empty').strip()}
     try:
-        return json.loads(out)
+        return _loads(out)
     except json.JSONDecodeError:
         return {'ok': False, 'error': f'INVALID_JSON: {out[:120]}'}
 
@@ -87,7 +98,7 @@ def fetch_jd(url: str, min_delay: float = 1.5, max_delay: float = 4.0) -> str:
     if not result_str:
         return ''
     try:
-        data = json.loads(result_str)
+        data = _loads(result_str)
         return data.get('jd', '').strip()
     except (json.JSONDecodeError, AttributeError):
         return ''
@@ -105,7 +116,7 @@ def main():
 
     limit = max(1, min(args.limit, 50))
     p = Path(args.yaml)
-    data = yaml.safe_load(p.read_text(encoding='utf-8')) or {}
+    data = yaml.load(p.read_text(encoding='utf-8'), Loader=_Loader) or {}
     items = data.get('internships', data) if isinstance(data, dict) else data
 
     targets = [
@@ -140,9 +151,9 @@ def main():
     # 写回（兼容 internships: [...] 和裸列表两种格式）
     if isinstance(data, dict):
         data['internships'] = items
-        p.write_text(yaml.dump(data, allow_unicode=True, default_flow_style=False, sort_keys=False), encoding='utf-8')
+        p.write_text(yaml.dump(data, Dumper=_Dumper, allow_unicode=True, default_flow_style=False, sort_keys=False), encoding='utf-8')
     else:
-        p.write_text(yaml.dump(items, allow_unicode=True, default_flow_style=False, sort_keys=False), encoding='utf-8')
+        p.write_text(yaml.dump(items, Dumper=_Dumper, allow_unicode=True, default_flow_style=False, sort_keys=False), encoding='utf-8')
 
     print(f'fetched={len(targets) - failed} failed={failed}')
     if failed:
@@ -3,11 +3,24 @@
 fetch_job_links.py — 通过 BOSS直聘内部 API 抓取职位列表，写入 internships.yaml。
 只写结构字段（title/company/salary/url 等），不写 jd_full/jd_summary（留给后续节点）。
 """
-import argparse, json, re, subprocess, time, random
+import argparse, itertools, json, re, subprocess, threading, time, random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from functools import partial
 from pathlib import Path
+from typing import Callable
 import yaml
 
+try:  # libyaml C 后端，缺失时退回纯 Python 实现
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
+try:
+    import ahocorasick  # 可选：pyahocorasick，关键词多时更快
+except ImportError:
+    ahocorasick = None
+
 ROOT = Path.home() / '.openclaw/workspace'
 MCP  = ROOT / 'skills/internship-scout/scripts/mcp_call.py'
 
@@ -30,6 +43,35 @@ CITY_CODES = {
 
 SCALE_CODES = {'20-99人': '302', '100-499人': '303'}
 
+# 搜索函数只在页面里定义一次，之后每次搜索只发一行调用
+SEARCH_JS_HELPER = (
+    "window.__scoutSearch=async(q,city,scale)=>{const r=await fetch(`/wapi/zpgeek/search/joblist.json"
+    "?query=${encodeURIComponent(q)}&city=${city}&page=1&pageSize=30"
+    "&jobType=4&scale=${scale}`,{credentials:'include'});"
+    "return JSON.stringify(await r.json());};'ok';"
+)
+
+SEARCH_WORKERS = 3
+# 同一个 Chrome 实例：请求 + 随机延迟整体串行，保持原有的风控节奏；
+# 并发只让 JSON 解析 / 过滤与下一次请求的等待重叠
+_SEARCH_LOCK = threading.Lock()
+# 任一次搜索失败后置位：排队等锁的线程不再发请求、不再睡眠，错误尽快抛给主线程
+_SEARCH_ABORT = threading.Event()
+
+# 预编译：parse_prefs 只跑一次，但 is_excluded / extract_json 每个职位、每次搜索都会调用
+_PREF_RES = {
+    'queries':   re.compile(r'搜索词[^:：]*[:：]\s*(.+)'),
+    'cities':    re.compile(r'目标城市[^:：]*[:：]\s*(.+)'),
+    'min_sal':   re.compile(r'日薪下限[^:：]*[:：]\s*(\d+)'),
+    'scales':    re.compile(r'公司规模[^:：]*[:：]\s*(.+)'),
+    'extra_exc': re.compile(r'排除关键词[^:：]*[:：]\s*(.+)'),
+    'big_tech':  re.compile(r'大厂排除[^:：]*[:：]\s*(.+)'),
+    'non_tech':  re.compile(r'非技术岗排除[^:：]*[:：]\s*(.+)'),
+}
+_LIST_SEP_RE = re.compile(r'[,，、]')
+_NUM_RE      = re.compile(r'(\d+)')
+_JSON_RE     = re.compile(r'\{.*\}', re.S)
+
 
 def run_mcp(tool, args_dict):
     out = subprocess.check_output(
@@ -39,30 +81,48 @@ def run_mcp(tool, args_dict):
     return out.strip()
 
 
-def parse_list(txt: str, pattern: str, default: str) -> list[str]:
-    m = re.search(pattern, txt)
+def parse_list(txt: str, pattern: re.Pattern, default: str) -> list[str]:
+    m = pattern.search(txt)
     raw = m.group(1).strip() if m else default
-    return [x.strip() for x in re.split(r'[,，、]', raw) if x.strip()]
+    return [x.strip() for x in _LIST_SEP_RE.split(raw) if x.strip()]
+
+
+def build_matcher(keywords) -> Callable[[str], bool]:
+    """把一组小写关键词编译成单次扫描、不区分大小写的子串匹配器：s 含任一关键词即为 True。
+    优先用 Aho–Corasick 自动机，否则退回预编译的正则多选分支。
+    正则分支用 IGNORECASE 直接匹配原串，省掉每个职位一次 .lower() 拷贝
+    （职位名、公司名多为纯中文，小写化本来就是空操作）。"""
+    kws = sorted({k for k in keywords if k}, key=len, reverse=True)
+    if not kws:
+        return lambda s: False
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for k in kws:
+            automaton.add_word(k, k)
+        automaton.make_automaton()
+        return lambda s: next(automaton.iter(s.lower()), None) is not None
+    pattern = re.compile('|'.join(map(re.escape, kws)), re.IGNORECASE)
+    return lambda s: pattern.search(s) is not None
 
 
 def parse_prefs(path: Path):
     txt = path.read_text(encoding='utf-8')
 
     def find(pattern, default=''):
-        m = re.search(pattern, txt)
+        m = pattern.search(txt)
         return m.group(1).strip() if m else default
 
-    queries   = parse_list(txt, r'搜索词[^:：]*[:：]\s*(.+)', 'agent')
-    cities    = parse_list(txt, r'目标城市[^:：]*[:：]\s*(.+)', '全国')
-    min_sal   = int(find(r'日薪下限[^:：]*[:：]\s*(\d+)', '150'))
-    scales    = parse_list(txt, r'公司规模[^:：]*[:：]\s*(.+)', '20-99人')
-    extra_exc = parse_list(txt, r'排除关键词[^:：]*[:：]\s*(.+)', '')
+    queries   = parse_list(txt, _PREF_RES['queries'], 'agent')
+    cities    = parse_list(txt, _PREF_RES['cities'], '全国')
+    min_sal   = int(find(_PREF_RES['min_sal'], '150'))
+    scales    = parse_list(txt, _PREF_RES['scales'], '20-99人')
+    extra_exc = [x.lower() for x in parse_list(txt, _PREF_RES['extra_exc'], '')]
 
     # 大厂排除：从 prefs 读取
     # - 留空 → 使用内置默认列表
     # - 填具体公司名 → 只排除填写的公司
     # - 填「无」或「不限」→ 不排除任何公司
-    big_tech_raw = parse_list(txt, r'大厂排除[^:：]*[:：]\s*(.+)', '')
+    big_tech_raw = parse_list(txt, _PREF_RES['big_tech'], '')
     if not big_tech_raw:
         big_tech = DEFAULT_BIG_TECH
     elif set(big_tech_raw) & {'无', '不限'}:
@@ -71,7 +131,7 @@ def parse_prefs(path: Path):
         big_tech = {x.lower() for x in big_tech_raw}
 
     # 非技术岗排除：从 prefs 读取，同上逻辑
-    non_tech_raw = parse_list(txt, r'非技术岗排除[^:：]*[:：]\s*(.+)', '')
+    non_tech_raw = parse_list(txt, _PREF_RES['non_tech'], '')
     if not non_tech_raw:
         non_tech = DEFAULT_NON_TECH
     elif set(non_tech_raw) & {'无', '不限'}:
@@ -81,31 +141,38 @@ def parse_prefs(path: Path):
 
     city_codes  = [CITY_CODES.get(c, '100010000') for c in cities]
     scale_codes = [SCALE_CODES[s] for s in scales if s in SCALE_CODES] or ['302']
-    return queries, city_codes, min_sal, scale_codes, extra_exc, big_tech, non_tech
+    return (queries, city_codes, min_sal, scale_codes,
+            build_matcher(extra_exc), build_matcher(big_tech), build_matcher(non_tech))
 
 
-def is_excluded(job: dict, min_sal: int, extra_exc: list,
-                big_tech: set, non_tech: set) -> bool:
-    name    = (job.get('jobName') or '').lower()
-    company = (job.get('brandName') or '').lower()
+def is_excluded(job: dict, min_sal: int, extra_exc: Callable[[str], bool],
+                big_tech: Callable[[str], bool], non_tech: Callable[[str], bool]) -> bool:
+    name    = job.get('jobName') or ''
+    company = job.get('brandName') or ''
     sal_str = job.get('salaryDesc') or ''
 
-    if any(k in company for k in big_tech):
+    if big_tech(company):
         return True
-    if any(k in name for k in non_tech):
+    if non_tech(name):
         return True
-    if any(k.lower() in name or k.lower() in company for k in extra_exc):
+    if extra_exc(name) or extra_exc(company):
         return True
 
-    m = re.search(r'(\d+)', sal_str)
+    m = _NUM_RE.search(sal_str)
     if m and int(m.group(1)) < min_sal:
         return True
 
     return False
 
 
+def filter_jobs(jobs: list[dict], min_sal: int, extra_exc: Callable[[str], bool],
+                big_tech: Callable[[str], bool], non_tech: Callable[[str], bool]) -> list[dict]:
+    """整批过滤一次搜索返回的职位，只留下未被排除的"""
+    return [job for job in jobs if not is_excluded(job, min_sal, extra_exc, big_tech, non_tech)]
+
+
 def extract_json(s: str):
-    m = re.search(r'\{.*\}', s, re.S)
+    m = _JSON_RE.search(s)
     if not m:
         return {}
     try:
@@ -114,6 +181,28 @@ def extract_json(s: str):
         return {}
 
 
+def search_jobs(task: tuple[str, str, str], exclude: tuple) -> list[dict]:
+    """执行一次搜索，返回经 filter_jobs 过滤后的职位；exclude 为 filter_jobs 的排除参数。
+    过滤在工作线程里做，与下一次请求的等待重叠。"""
+    # 参数经 JSON 转义后传入，搜索词里带引号也不会破坏脚本
+    js = f"__scoutSearch({', '.join(json.dumps(x, ensure_ascii=False) for x in task)})"
+    with _SEARCH_LOCK:
+        if _SEARCH_ABORT.is_set():
+            return []
+        try:
+            raw = run_mcp('chrome_javascript', {'code': js})
+        except BaseException:
+            _SEARCH_ABORT.set()
+            raise
+        # 每次搜索之间随机延迟 1-3s，避免触发风控
+        delay = random.uniform(1.0, 3.0)
+        print(f'  sleeping {delay:.1f}s...')
+        time.sleep(delay)
+    data_j = extract_json(raw)
+    jobs   = ((data_j.get('zpData') or {}).get('jobList') or []) if isinstance(data_j, dict) else []
+    return filter_jobs(jobs, *exclude)
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--prefs', required=True)
@@ -123,41 +212,57 @@ def main():
     prefs_path = Path(args.prefs)
     yaml_path  = Path(args.yaml)
 
-    data  = yaml.safe_load(yaml_path.read_text(encoding='utf-8')) or []
+    data  = yaml.load(yaml_path.read_text(encoding='utf-8'), Loader=_Loader) or []
     items = data if isinstance(data, list) else []
-    by_url = {it.get('url'): it for it in items if isinstance(it, dict) and it.get('url')}
+    seen_urls = {it['url'] for it in items if isinstance(it, dict) and it.get('url')}
+
+    # 新增记录边抓边追加到 JSONL；正常结束写回 YAML 后删除。
+    # 若上次运行中途崩溃，日志里的记录在这里补回，不丢已抓到的结果。
+    log_path = yaml_path.with_name(yaml_path.stem + '.added.jsonl')
+    recovered = 0
+    if log_path.exists():
+        text = log_path.read_text(encoding='utf-8')
+        for line in text.splitlines():
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 崩溃时写了一半的行
+            url = rec.get('url') if isinstance(rec, dict) else None
+            if url and url not in seen_urls:
+                items.append(rec)
+                seen_urls.add(url)
+                recovered += 1
+        if text and not text.endswith('\n'):
+            # 补上半行的换行：本次追加的第一条记录不会接在残行后面、变得无法解析
+            with log_path.open('a', encoding='utf-8') as f:
+                f.write('\n')
+        print(f'recovered={recovered} from {log_path.name}')
 
     queries, city_codes, min_sal, scale_codes, extra_exc, big_tech, non_tech = parse_prefs(prefs_path)
 
-    # 激活 cookie
+    # 激活 cookie，并在页面里注册搜索函数
     run_mcp('chrome_navigate', {'url': 'https://www.zhipin.com/web/geek/job?query=agent&city=100010000'})
+    run_mcp('chrome_javascript', {'code': SEARCH_JS_HELPER})
 
     added = 0
-    for q in queries:
-        for city in city_codes:
-            for scale in scale_codes:
-                js = (
-                    f"(async()=>{{const r=await fetch(`/wapi/zpgeek/search/joblist.json"
-                    f"?query=${{encodeURIComponent('{q}')}}&city={city}&page=1&pageSize=30"
-                    f"&jobType=4&scale={scale}`,{{credentials:'include'}});"
-                    f"return JSON.stringify(await r.json());}})();"
-                )
-                raw    = run_mcp('chrome_javascript', {'code': js})
-                data_j = extract_json(raw)
-                jobs   = ((data_j.get('zpData') or {}).get('jobList') or []) if isinstance(data_j, dict) else []
-
+    today = str(date.today())  # 整次运行共用一个收录日期，跨零点也不会前后不一
+    tasks = list(itertools.product(queries, city_codes, scale_codes))
+    with log_path.open('a', encoding='utf-8') as log, \
+            ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as ex:
+        # map 保持任务顺序，写入顺序与串行版本一致
+        search = partial(search_jobs, exclude=(min_sal, extra_exc, big_tech, non_tech))
+        try:
+            for jobs in ex.map(search, tasks):
                 for job in jobs:
                     eid = job.get('encryptJobId', '')
                     if not eid:
                         continue
                     url = f'https://www.zhipin.com/job_detail/{eid}.html'
-                    if url in by_url:
-                        continue
-                    if is_excluded(job, min_sal, extra_exc, big_tech, non_tech):
+                    if url in seen_urls:
                         continue
 
                     rec = {
-                        'collected_at':   str(date.today()),
+                        'collected_at':   today,
                         'company':        (job.get('brandName') or '').strip(),
                         'title':          job.get('jobName', ''),
                         'salary':         job.get('salaryDesc', ''),
@@ -175,15 +280,18 @@ def main():
                         'notion_page_id': '',
                     }
                     items.append(rec)
-                    by_url[url] = rec
+                    seen_urls.add(url)
+                    log.write(json.dumps(rec, ensure_ascii=False) + '\n')
+                    log.flush()
                     added += 1
-
-                # 每次搜索之间随机延迟 1-3s，避免触发风控
-                delay = random.uniform(1.0, 3.0)
-                print(f'  sleeping {delay:.1f}s...')
-                time.sleep(delay)
-
-    yaml_path.write_text(yaml.dump(items, allow_unicode=True, sort_keys=False), encoding='utf-8')
+        except BaseException:
+            # 与串行版本一样遇错即停：撤掉还没开始的搜索，不等整张网格跑完
+            _SEARCH_ABORT.set()
+            ex.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    yaml_path.write_text(yaml.dump(items, Dumper=_Dumper, allow_unicode=True, sort_keys=False), encoding='utf-8')
+    log_path.unlink(missing_ok=True)
     print(f'added={added} total={len(items)}')
 
 
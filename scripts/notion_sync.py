@@ -8,7 +8,8 @@ Usage:
 
 Modes:
   new    POST entries where notion_page_id is empty (default)
-  update PATCH entries that already have notion_page_id (full overwrite)
+  update PATCH entries that already have notion_page_id (full overwrite,
+         skipped when the page's current properties already match)
   all    new + update
   reset  archive all DB pages → clear YAML notion_page_ids → POST all entries fresh
 
@@ -21,6 +22,7 @@ Inputs:
 
 Outputs:
   stdout:    ✅ Company | created/updated   or   ❌ Company | reason
+             = Company | skipped   (update whose Notion page already matches)
   Side-effect: writes notion_page_id back to YAML for newly created pages.
   Exit code: 0 = all succeeded, 1 = any failure.
 
@@ -30,8 +32,11 @@ Environment:
 
 import argparse
 import asyncio
+import functools
+import hashlib
 import json
 import os
+import random
 import re
 import sys
 import time
@@ -43,13 +48,38 @@ except ImportError:
     print("❌ aiohttp not installed. Run: pip install aiohttp")
     sys.exit(1)
 
+try:
+    import yaml
+except ImportError:
+    print("❌ pyyaml not installed. Run: pip install pyyaml")
+    sys.exit(1)
+
+try:  # libyaml C backend; fall back to the pure-Python loader/dumper
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
+try:  # orjson serializes straight to bytes, several times faster than json
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+try:  # libuv event loop: cheaper task scheduling for large gather() fan-outs
+    import uvloop
+except ImportError:
+    uvloop = None
+
 WORKSPACE    = Path("~/.openclaw/workspace").expanduser()
 DEFAULT_YAML = WORKSPACE / "internships.yaml"
 PREFS_FILE   = WORKSPACE / "internship-prefs.md"
+NOTION_CACHE = WORKSPACE / ".notion_cache.json"
 API_VERSION  = "2022-06-28"
 NOTION_KEY   = os.environ.get("NOTION_API_KEY", "")
 BASE_URL     = "https://api.notion.com/v1"
-CONCURRENCY  = 3  # stay within Notion's ~3 req/s average
+CONCURRENCY  = 3    # max writes in flight = pooled connections to Notion
+RATE_LIMIT   = 3.0  # requests/second — Notion's documented average limit
 
 FIELD_MAP = {
     "company":       ("Name",     "title"),
@@ -66,10 +96,35 @@ FIELD_MAP = {
     "jd_full":       ("JD原文",   "rich_text"),
 }
 
+DB_SCHEMA = {
+    "Name": {"title": {}},
+    "薪资": {"rich_text": {}}, "城市": {"rich_text": {}},
+    "规模": {"select": {"options": [{"name": "20-99人", "color": "green"}, {"name": "100-499人", "color": "blue"}]}},
+    "融资阶段": {"select": {"options": [
+        {"name": "天使轮", "color": "pink"}, {"name": "A轮", "color": "orange"},
+        {"name": "B轮", "color": "yellow"}, {"name": "C轮", "color": "green"},
+        {"name": "未融资", "color": "gray"}, {"name": "不需要融资", "color": "gray"},
+    ]}},
+    "JD质量": {"select": {"options": [{"name": "good", "color": "green"}, {"name": "unclear", "color": "yellow"}, {"name": "skip", "color": "red"}]}},
+    "状态": {"select": {"options": [
+        {"name": "pending", "color": "gray"}, {"name": "applied", "color": "blue"},
+        {"name": "interviewing", "color": "orange"}, {"name": "offered", "color": "green"},
+        {"name": "rejected", "color": "red"}, {"name": "ghosted", "color": "brown"},
+    ]}},
+    "技术标签": {"multi_select": {"options": []}},
+    "来源": {"rich_text": {}}, "链接": {"url": {}},
+    "收录日期": {"date": {}}, "JD摘要": {"rich_text": {}},
+}
+SCHEMA_HASH = hashlib.sha1(json.dumps(DB_SCHEMA, sort_keys=True).encode()).hexdigest()
+
 # ── DB ID helpers ─────────────────────────────────────────────────────────────
 
+_DB_ID_RE     = re.compile(r"([0-9a-f]{32})")
+_PREFS_ID_RE  = re.compile(r"notion_db_id:\s*([^\s\n]+)")
+_PREFS_SUB_RE = re.compile(r"notion_db_id:\s*[^\n]*")
+
 def extract_db_id(raw: str) -> str:
-    m = re.search(r"([0-9a-f]{32})", raw.replace("-", ""))
+    m = _DB_ID_RE.search(raw.replace("-", ""))
     if not m:
         return ""
     h = m.group(1)
@@ -78,24 +133,55 @@ def extract_db_id(raw: str) -> str:
 def read_prefs_db_id() -> str:
     if not PREFS_FILE.exists():
         return ""
-    m = re.search(r"notion_db_id:\s*([^\s\n]+)", PREFS_FILE.read_text())
+    m = _PREFS_ID_RE.search(PREFS_FILE.read_text())
     return m.group(1).strip() if m else ""
 
 def write_prefs_db_id(db_id: str):
     text = PREFS_FILE.read_text() if PREFS_FILE.exists() else ""
     if "notion_db_id:" in text:
-        text = re.sub(r"notion_db_id:\s*[^\n]*", f"notion_db_id: {db_id}", text)
+        text = _PREFS_SUB_RE.sub(f"notion_db_id: {db_id}", text)
     else:
         text = text.rstrip() + f"\n\n## Notion 数据库\n\n- notion_db_id: {db_id}\n"
     PREFS_FILE.write_text(text)
 
+def _prefs_mtime() -> int:
+    return PREFS_FILE.stat().st_mtime_ns if PREFS_FILE.exists() else 0
+
+def read_cached_db_id() -> str:
+    """db_id from NOTION_CACHE, trusted only while the prefs file, API version
+    and DB_SCHEMA are all unchanged since it was written."""
+    try:
+        cache = json.loads(NOTION_CACHE.read_text())
+    except (OSError, ValueError):
+        return ""
+    if not isinstance(cache, dict):
+        return ""
+    if (cache.get("api_version") != API_VERSION or cache.get("schema_hash") != SCHEMA_HASH
+            or cache.get("prefs_mtime") != _prefs_mtime()):
+        return ""
+    db_id = cache.get("db_id")
+    return db_id if isinstance(db_id, str) else ""
+
+def write_cached_db_id(db_id: str):
+    try:
+        NOTION_CACHE.write_text(json.dumps({
+            "db_id": db_id, "schema_hash": SCHEMA_HASH,
+            "api_version": API_VERSION, "prefs_mtime": _prefs_mtime(),
+        }))
+    except OSError:
+        pass  # cache only; next run reads the prefs file again
+
 def resolve_db_id(arg: str) -> str:
     if arg:
         db_id = extract_db_id(arg)
         if db_id:
             return db_id
+    db_id = read_cached_db_id()
+    if db_id:
+        return db_id
     db_id = read_prefs_db_id()
     if db_id:
+        write_cached_db_id(db_id)
         return db_id
     print("⚠️  未找到 Notion 数据库 ID。")
     print("请提供：UUID / Notion 分享链接 / 输入 'new' 新建")
@@ -108,6 +194,7 @@ def resolve_db_id(arg: str) -> str:
         print("❌ 无法解析，退出。")
         sys.exit(1)
     write_prefs_db_id(db_id)
+    write_cached_db_id(db_id)
     print(f"✅ 已保存 notion_db_id: {db_id}")
     return db_id
 
@@ -120,38 +207,86 @@ def headers() -> dict:
         "Content-Type": "application/json",
     }
 
+def new_session() -> aiohttp.ClientSession:
+    # One pooled keep-alive session per run: headers attach once and each
+    # connection's TLS handshake is amortized across every Notion call.
+    connector = aiohttp.TCPConnector(limit=CONCURRENCY, ttl_dns_cache=300,
+                                     keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector, headers=headers())
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart.
+
+    Each caller reserves the next free slot synchronously and sleeps until it,
+    so no lock (and no binding to a particular event loop) is needed."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+limiter = RateLimiter(RATE_LIMIT)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+def backoff(attempt: int) -> float:
+    return min(30, 0.5 * 2 ** attempt) + random.uniform(0, 0.5)
+
 async def notion_req(session: aiohttp.ClientSession, method: str,
                      endpoint: str, payload: dict | None = None,
-                     retries: int = 3) -> dict:
+                     retries: int = 5) -> dict:
     url = f"{BASE_URL}/{endpoint}"
+    body = _dumps(payload) if payload is not None else None
     for attempt in range(retries):
+        await limiter.wait()
         try:
-            async with session.request(method, url, json=payload,
-                                       headers=headers(), timeout=aiohttp.ClientTimeout(total=15)) as resp:
-                if resp.status == 429:
-                    wait = int(resp.headers.get("Retry-After", "2"))
-                    print(f"  ⏳ rate limited, waiting {wait}s...")
-                    await asyncio.sleep(wait)
-                    continue
-                return await resp.json()
+            # Content-Type: application/json is set once on the session
+            async with session.request(method, url, data=body,
+                                       timeout=aiohttp.ClientTimeout(total=15)) as resp:
+                if resp.status not in RETRY_STATUS:
+                    return await resp.json()
+                # Retry-After wins when Notion sends it; otherwise back off exponentially
+                wait = float(resp.headers.get("Retry-After") or 0) or backoff(attempt)
+                status = resp.status
         except Exception as e:
             if attempt == retries - 1:
                 return {"error": str(e)}
-            await asyncio.sleep(1.5)
+            wait = backoff(attempt)
+            status = None
+        if attempt == retries - 1:
+            break
+        if status == 429:
+            print(f"  ⏳ rate limited, waiting {wait:.1f}s...")
+        elif status:
+            print(f"  ⏳ HTTP {status}, retrying in {wait:.1f}s...")
+        await asyncio.sleep(wait)
     return {"error": "max retries exceeded"}
 
 # ── YAML helpers ──────────────────────────────────────────────────────────────
 
-def parse_yaml(path: Path) -> list[dict]:
-    try:
-        import yaml as _yaml
-        raw = _yaml.safe_load(path.read_text())
-    except ImportError:
-        raw = None
+@functools.lru_cache(maxsize=4)
+def _load_yaml_cached(path: Path, mtime_ns: int):
+    return yaml.load(path.read_text(), Loader=_Loader)
+
+def load_yaml(path: Path):
+    """Parsed YAML, re-read only when the file's mtime changes.
 
-    if raw is None:
-        # fallback: try ruamel or plain regex
-        raw = None
+    Callers that mutate the result must persist it via dump_yaml(), which
+    drops the cache so the edited object is never served again."""
+    return _load_yaml_cached(path, path.stat().st_mtime_ns)
+
+def dump_yaml(path: Path, raw):
+    path.write_text(yaml.dump(raw, Dumper=_Dumper, allow_unicode=True, sort_keys=False))
+    _load_yaml_cached.cache_clear()
+
+def parse_yaml(path: Path) -> list[dict]:
+    raw = load_yaml(path)
 
     # Support both top-level list and {"internships": [...]}
     if isinstance(raw, dict):
@@ -160,94 +295,141 @@ def parse_yaml(path: Path) -> list[dict]:
                 raw = raw[key]
                 break
         else:
-            raw = list(raw.values())[0] if raw else []
+            raw = next(iter(raw.values()), [])
 
     if not isinstance(raw, list):
         return []
 
-    entries = []
-    for item in raw:
-        if not isinstance(item, dict):
-            continue
-        e = {}
-        for f in ["company", "salary", "location", "company_size",
-                  "funding_stage", "jd_summary", "jd_full", "url", "source", "status",
-                  "jd_quality", "collected_at", "notion_page_id"]:
-            val = item.get(f, "")
-            e[f] = str(val) if val is not None else ""
-        tags = item.get("tags", [])
+    # Raw mappings, no copying: fields are normalized on demand by field_value()
+    # only for entries that survive --filter / --mode selection.
+    return [item for item in raw if isinstance(item, dict)]
+
+def text_field(entry: dict, key: str) -> str:
+    val = entry.get(key)
+    return "" if val is None else str(val)
+
+def field_value(entry: dict, key: str):
+    """Normalized value of one raw YAML field, as build_props consumes it."""
+    if key == "tags":
+        tags = entry.get("tags")
         if isinstance(tags, list):
-            e["tags"] = [str(t) for t in tags if t]
-        elif isinstance(tags, str):
-            e["tags"] = [t.strip() for t in tags.split(",") if t.strip()]
-        else:
-            e["tags"] = []
-        if not e.get("jd_full"):
-            legacy = item.get("jd_summary", "")
-            e["jd_full"] = str(legacy) if legacy is not None else ""
-        if not e.get("jd_summary"):
-            txt = " ".join(str(e.get("jd_full", "")).split())
-            e["jd_summary"] = txt[:50]
-        entries.append(e)
-    return entries
+            return [str(t) for t in tags if t]
+        if isinstance(tags, str):
+            return [t.strip() for t in tags.split(",") if t.strip()]
+        return []
+    val = text_field(entry, key)
+    if val:
+        return val
+    if key == "jd_full":
+        # legacy entries kept the raw JD in jd_summary
+        return text_field(entry, "jd_summary")
+    if key == "jd_summary":
+        return " ".join(field_value(entry, "jd_full").split())[:50]
+    return val
+
+def filter_entries(entries: list[dict], company_filter: str) -> list[dict]:
+    """Entries whose company contains company_filter (case-insensitive)."""
+    if not company_filter:
+        return entries
+    flt = company_filter.lower()
+    return [e for e in entries if flt in text_field(e, "company").lower()]
 
 def clear_notion_ids(path: Path):
-    import yaml as _yaml
-    raw = _yaml.safe_load(path.read_text())
-    lst = raw["internships"] if isinstance(raw, dict) and "internships" in raw else raw
+    raw = load_yaml(path)
+    lst = raw.get("internships", raw) if isinstance(raw, dict) else raw
+    changed = False
     for item in lst:
-        if isinstance(item, dict):
+        if isinstance(item, dict) and item.get("notion_page_id") != "":
             item["notion_page_id"] = ""
-    path.write_text(_yaml.dump(raw, allow_unicode=True, sort_keys=False))
-
-def write_notion_id(path: Path, url: str, notion_id: str):
-    import yaml as _yaml
-    raw = _yaml.safe_load(path.read_text())
-    lst = raw["internships"] if isinstance(raw, dict) and "internships" in raw else raw
+            changed = True
+    if changed:
+        dump_yaml(path, raw)
+
+def write_notion_ids(path: Path, ids: dict[str, str]):
+    """Write back notion_page_id for every url in ids with one load + dump.
+    The file is left untouched when every id is already in place."""
+    raw = load_yaml(path)
+    lst = raw.get("internships", raw) if isinstance(raw, dict) else raw
+    changed = False
     for item in lst:
-        if isinstance(item, dict) and item.get("url") == url:
-            item["notion_page_id"] = notion_id
-            break
-    path.write_text(_yaml.dump(raw, allow_unicode=True, sort_keys=False))
+        if isinstance(item, dict) and item.get("url") in ids:
+            nid = ids[item["url"]]
+            if item.get("notion_page_id") != nid:
+                item["notion_page_id"] = nid
+                changed = True
+    if changed:
+        dump_yaml(path, raw)
 
 # ── Property builder ──────────────────────────────────────────────────────────
 
+BUILDERS = {
+    "title":        lambda v: {"title": [{"text": {"content": str(v)[:2000]}}]},
+    "rich_text":    lambda v: {"rich_text": [{"text": {"content": str(v)[:2000]}}]},
+    "select":       lambda v: {"select": {"name": str(v)}},
+    "multi_select": lambda v: {"multi_select": [{"name": t} for t in v[:10]]},
+    "url":          lambda v: {"url": v},
+    "date":         lambda v: {"date": {"start": v}},
+}
+
+# (yaml_key, notion_key, builder, always_sent) resolved once at import
+PROP_FIELDS = [(yaml_key, notion_key, BUILDERS[notion_type], yaml_key == "company")
+               for yaml_key, (notion_key, notion_type) in FIELD_MAP.items()]
+
 def build_props(entry: dict) -> dict:
     props = {}
-    for yaml_key, (notion_key, notion_type) in FIELD_MAP.items():
-        val = entry.get(yaml_key, "")
-        if not val and yaml_key != "company":
-            continue
-        if notion_type == "title":
-            props[notion_key] = {"title": [{"text": {"content": str(val)[:2000]}}]}
-        elif notion_type == "rich_text":
-            props[notion_key] = {"rich_text": [{"text": {"content": str(val)[:2000]}}]}
-        elif notion_type == "select":
-            props[notion_key] = {"select": {"name": str(val)}}
-        elif notion_type == "multi_select":
-            props[notion_key] = {"multi_select": [{"name": t} for t in val[:10]]}
-        elif notion_type == "url":
-            props[notion_key] = {"url": val}
-        elif notion_type == "date":
-            props[notion_key] = {"date": {"start": val}}
+    for yaml_key, notion_key, build, always in PROP_FIELDS:
+        val = field_value(entry, yaml_key)
+        if val or always:
+            props[notion_key] = build(val)
     return props
 
+def prop_value(prop: dict | None):
+    """Comparable value of a Notion property, whether built locally or fetched."""
+    if not prop:
+        return None
+    if "title" in prop or "rich_text" in prop:
+        parts = prop.get("title") or prop.get("rich_text") or []
+        return "".join(t.get("plain_text") or t.get("text", {}).get("content", "")
+                       for t in parts)
+    if "select" in prop:
+        return (prop["select"] or {}).get("name")
+    if "multi_select" in prop:
+        return [o.get("name") for o in prop["multi_select"] or []]
+    if "date" in prop:
+        return (prop["date"] or {}).get("start")
+    if "url" in prop:
+        return prop["url"]
+    return None
+
+def props_unchanged(props: dict, current: dict) -> bool:
+    # Only keys we would send matter: a PATCH leaves the others untouched anyway.
+    return all(prop_value(v) == prop_value(current.get(k)) for k, v in props.items())
+
 # ── Core async tasks ──────────────────────────────────────────────────────────
 
-async def fetch_all_page_ids(session: aiohttp.ClientSession, db_id: str) -> list[str]:
-    ids = []
+async def iter_pages(session: aiohttp.ClientSession, db_id: str, params: str = ""):
+    """Yield database pages as each 100-page query batch arrives."""
     cursor = None
     while True:
         payload = {"page_size": 100}
         if cursor:
             payload["start_cursor"] = cursor
-        res = await notion_req(session, "POST", f"databases/{db_id}/query", payload)
+        res = await notion_req(session, "POST", f"databases/{db_id}/query{params}", payload)
         for p in res.get("results", []):
-            ids.append(p["id"])
+            yield p
         if not res.get("has_more"):
             break
         cursor = res.get("next_cursor")
-    return ids
+
+async def fetch_all_pages(session: aiohttp.ClientSession, db_id: str) -> dict[str, dict]:
+    """{page_id: properties} for every page currently in the database."""
+    return {p["id"]: p.get("properties", {}) async for p in iter_pages(session, db_id)}
+
+async def iter_page_ids(session: aiohttp.ClientSession, db_id: str):
+    # "title" is the fixed property id of every database's title column; asking
+    # for only that keeps the reset listing payload small.
+    async for p in iter_pages(session, db_id, "?filter_properties=title"):
+        yield p["id"]
 
 async def archive_page(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
                        page_id: str) -> bool:
@@ -256,17 +438,23 @@ async def archive_page(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
         return bool(res.get("archived") or res.get("id"))
 
 async def upsert_entry(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
-                       entry: dict, db_id: str, yaml_path: Path,
-                       dry_run: bool) -> tuple[str, bool]:
-    company = entry.get("company", "?")
-    nid = entry.get("notion_page_id", "")
+                       entry: dict, db_id: str, new_ids: dict[str, str],
+                       current: dict[str, dict], dry_run: bool) -> tuple[str, bool]:
+    company = text_field(entry, "company")
+    nid = text_field(entry, "notion_page_id")
     action = "updated" if nid else "created"
 
     if dry_run:
         return (f"[dry-run] {action} → {company}", True)
 
+    props = build_props(entry)
+    if nid in current and props_unchanged(props, current[nid]):
+        return (f"= {company} | skipped", True)
+
+    # The semaphore bounds writes in flight to the pool size, so queued
+    # requests never wait for a connection inside their 15 s timeout; the
+    # limiter in notion_req then paces the ones holding a slot.
     async with sem:
-        props = build_props(entry)
         if nid:
             res = await notion_req(session, "PATCH", f"pages/{nid}", {"properties": props})
         else:
@@ -275,42 +463,46 @@ async def upsert_entry(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
 
     if res.get("id"):
         if not nid and entry.get("url"):
-            write_notion_id(yaml_path, entry["url"], res["id"])
+            new_ids[text_field(entry, "url")] = res["id"]
         return (f"✅ {company} | {action}", True)
     else:
         err = res.get("message") or res.get("error") or "unknown"
         return (f"❌ {company} | {err[:80]}", False)
 
+async def upsert_all(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
+                     entries: list[dict], db_id: str, yaml_path: Path,
+                     dry_run: bool, current: dict[str, dict] | None = None
+                     ) -> list[tuple[str, bool]]:
+    # Created page ids are collected in memory and written back in one pass;
+    # the finally keeps ids of pages already created even if the batch dies.
+    new_ids: dict[str, str] = {}
+    try:
+        return await asyncio.gather(*(upsert_entry(session, sem, e, db_id, new_ids,
+                                                   current or {}, dry_run)
+                                      for e in entries))
+    finally:
+        if new_ids:
+            write_notion_ids(yaml_path, new_ids)
+
 async def create_database_sync() -> str:
-    async with aiohttp.ClientSession() as session:
+    async with new_session() as session:
         parent_id = "3102496b-9cb5-8003-8188-d6bf72b71afa"
-        res = await notion_req(session, "POST", "databases", {
+        create = {
             "parent": {"type": "page_id", "page_id": parent_id},
             "icon": {"type": "emoji", "emoji": "📋"},
             "title": [{"type": "text", "text": {"content": "实习岗位追踪"}}],
-        })
+        }
+        # One request when the API accepts the schema inline; otherwise the
+        # old create-then-PATCH pair.
+        res = await notion_req(session, "POST", "databases", {**create, "properties": DB_SCHEMA})
         db_id = res.get("id", "")
         if not db_id:
-            print("❌ 创建失败:", res.get("message", ""))
-            sys.exit(1)
-        await notion_req(session, "PATCH", f"databases/{db_id}", {"properties": {
-            "薪资": {"rich_text": {}}, "城市": {"rich_text": {}},
-            "规模": {"select": {"options": [{"name": "20-99人", "color": "green"}, {"name": "100-499人", "color": "blue"}]}},
-            "融资阶段": {"select": {"options": [
-                {"name": "天使轮", "color": "pink"}, {"name": "A轮", "color": "orange"},
-                {"name": "B轮", "color": "yellow"}, {"name": "C轮", "color": "green"},
-                {"name": "未融资", "color": "gray"}, {"name": "不需要融资", "color": "gray"},
-            ]}},
-            "JD质量": {"select": {"options": [{"name": "good", "color": "green"}, {"name": "unclear", "color": "yellow"}, {"name": "skip", "color": "red"}]}},
-            "状态": {"select": {"options": [
-                {"name": "pending", "color": "gray"}, {"name": "applied", "color": "blue"},
-                {"name": "interviewing", "color": "orange"}, {"name": "offered", "color": "green"},
-                {"name": "rejected", "color": "red"}, {"name": "ghosted", "color": "brown"},
-            ]}},
-            "技术标签": {"multi_select": {"options": []}},
-            "来源": {"rich_text": {}}, "链接": {"url": {}},
-            "收录日期": {"date": {}}, "JD摘要": {"rich_text": {}},
-        }})
+            res = await notion_req(session, "POST", "databases", create)
+            db_id = res.get("id", "")
+            if not db_id:
+                print("❌ 创建失败:", res.get("message", ""))
+                sys.exit(1)
+            await notion_req(session, "PATCH", f"databases/{db_id}", {"properties": DB_SCHEMA})
         print(f"✅ 数据库已创建: {db_id}")
         return db_id
 
@@ -319,39 +511,37 @@ async def create_database_sync() -> str:
 async def run(args):
     yaml_path = Path(args.yaml).expanduser()
     db_id = resolve_db_id(args.db_id)
-    entries = parse_yaml(yaml_path)
-
-    if args.filter:
-        entries = [e for e in entries if args.filter.lower() in e.get("company", "").lower()]
+    entries = filter_entries(parse_yaml(yaml_path), args.filter)
 
     sem = asyncio.Semaphore(CONCURRENCY)
 
-    async with aiohttp.ClientSession() as session:
+    async with new_session() as session:
 
         # ── reset: archive all → clear YAML → rebuild ──
         if args.mode == "reset":
-            print("🔄 Step 1/3: 查询数据库所有页面...")
-            page_ids = await fetch_all_page_ids(session, db_id)
-            print(f"  找到 {len(page_ids)} 条，开始 archive...")
+            print("🔄 Step 1/3: 查询数据库所有页面并 archive...")
+            # Archives start as soon as each query batch arrives, so paging
+            # overlaps with archiving. Notion cursors point at a page id, so
+            # archiving earlier pages does not shift later batches.
+            tasks, n_pages = [], 0
+            async for pid in iter_page_ids(session, db_id):
+                n_pages += 1
+                if not args.dry_run:
+                    tasks.append(asyncio.create_task(archive_page(session, sem, pid)))
 
             if not args.dry_run:
-                tasks = [archive_page(session, sem, pid) for pid in page_ids]
                 results = await asyncio.gather(*tasks)
                 ok = sum(results)
-                print(f"  archived {ok}/{len(page_ids)}")
+                print(f"  archived {ok}/{n_pages}")
 
                 print("🔄 Step 2/3: 清空 YAML notion_page_id...")
                 clear_notion_ids(yaml_path)
-                entries = parse_yaml(yaml_path)
-                if args.filter:
-                    entries = [e for e in entries if args.filter.lower() in e.get("company","").lower()]
+                entries = filter_entries(parse_yaml(yaml_path), args.filter)
             else:
-                print(f"  [dry-run] would archive {len(page_ids)} pages")
+                print(f"  [dry-run] would archive {n_pages} pages")
 
             print(f"🔄 Step 3/3: 全量重建 {len(entries)} 条...")
-            tasks = [upsert_entry(session, sem, e, db_id, yaml_path, args.dry_run)
-                     for e in entries]
-            results = await asyncio.gather(*tasks)
+            results = await upsert_all(session, sem, entries, db_id, yaml_path, args.dry_run)
             errors = 0
             for msg, ok in results:
                 print(f"  {msg}")
@@ -371,9 +561,13 @@ async def run(args):
         print(f"DB: {db_id} | mode: {args.mode} | entries: {len(target)}"
               + (" [dry-run]" if args.dry_run else ""))
 
-        tasks = [upsert_entry(session, sem, e, db_id, yaml_path, args.dry_run)
-                 for e in target]
-        results = await asyncio.gather(*tasks)
+        # Current page state lets unchanged entries skip their PATCH entirely
+        current = {}
+        if not args.dry_run and any(e.get("notion_page_id") for e in target):
+            current = await fetch_all_pages(session, db_id)
+
+        results = await upsert_all(session, sem, target, db_id, yaml_path,
+                                   args.dry_run, current)
         errors = 0
         for msg, ok in results:
             print(msg)
@@ -395,7 +589,9 @@ def main():
         print("❌ NOTION_API_KEY not set")
         sys.exit(1)
 
-    errors = asyncio.run(run(args))
+    # uvloop.run replaces the deprecated uvloop.install() policy switch
+    runner = uvloop.run if uvloop is not None else asyncio.run
+    errors = runner(run(args))
     sys.exit(0 if errors == 0 else 1)
 
 
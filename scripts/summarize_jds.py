@@ -3,11 +3,14 @@
 summarize_jds.py — 为 internships.yaml 批量生成 jd_summary、tags、jd_quality（ABCD）。
 
 工作流：
-  输入：internships.yaml（有 jd_full 但缺 jd_summary/tags/jd_quality 的条目）
+  输入：internships.yaml（有 jd_full 但缺 jd_summary/tags/jd_quality 的条目，
+        以及摘要生成后 jd_full 又变过、与记录的 jd_hash 对不上的条目）
   输出：写回 internships.yaml（jd_summary 30-50字、tags 技术栈、jd_quality A/B/C/D）
 
   每批最多 5 条，spawn cleanup=delete subagent 做纯文本推理（不使用任何 tools）。
-  主会话串行处理各批次，等回传后写回再继续下一批。
+  主会话并发处理各批次（默认同时 4 个 subagent），全部回传后一次写回。
+  运行中每批结果先追加到 internships.updates.jsonl，中途崩溃后可用 --resume 补回。
+  jd_full 相同的条目只派一次，结果按内容指纹缓存在 YAML 同目录的 jd_cache.json。
 
 用法：
   # 处理所有待处理条目
@@ -16,28 +19,62 @@ summarize_jds.py — 为 internships.yaml 批量生成 jd_summary、tags、jd_qu
   # 只处理前 10 条
   python3 scripts/summarize_jds.py --limit 10
 
+  # 每批 8 条、最多 2 个 subagent 同时跑
+  python3 scripts/summarize_jds.py --batch-size 8 --concurrency 2
+
+  # 用 gateway 事件流等结果（端点不可用时自动退回轮询）
+  python3 scripts/summarize_jds.py --use-sse
+
+  # 上次运行中途崩溃：先补回已完成批次的结果，再处理剩余条目
+  python3 scripts/summarize_jds.py --resume
+
   # 强制重处理已有 summary 的条目
   python3 scripts/summarize_jds.py --refetch
 
   # 列出待处理条目
   python3 scripts/summarize_jds.py --list-pending
 
-  # 只打印某批 prompt（调试用）
-  python3 scripts/summarize_jds.py --dry-run --batch 0
+  # 只打印前 5 条的 prompt（调试用）
+  python3 scripts/summarize_jds.py --dry-run --limit 5
 """
 from __future__ import annotations
 
 import argparse
+import hashlib
+import http.client
 import json
+import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
+from urllib.parse import quote
 
 import yaml
 
+try:  # orjson 更快，且直接产出 bytes；其 JSONDecodeError 是 json.JSONDecodeError 的子类
+    import orjson
+    _loads, _dumps = orjson.loads, orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+try:  # libyaml C 后端，缺失时退回纯 Python 实现
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
 WORKSPACE = Path.home() / '.openclaw/workspace'
 YAML_PATH = WORKSPACE / 'internships.yaml'
 BATCH_SIZE = 5
+CONCURRENCY = 4
+MAX_JD_CHARS = 1500  # 每条 JD 进 prompt 的字符上限，0 = 不截断
+GATEWAY_HOST, GATEWAY_PORT = 'localhost', 19000
+POLL_INTERVAL_MAX = 8.0
 
 SYSTEM_PROMPT = """你是一个 JD 质量评分助手。只输出 JSON，不使用任何工具，不联网，不查询外部信息。
 
@@ -98,164 +135,415 @@ Step 5 — 提取 tags（3-8个，只从原文提取具体技术名称，候选
 # ── YAML helpers ──────────────────────────────────────────────────────────────
 
 def load_data(path: Path) -> tuple[dict, list]:
-    data = yaml.safe_load(path.read_text(encoding='utf-8'))
+    # 直接把文件对象交给 loader 流式解析，不先整份 read_text 成一个大字符串
+    with path.open('rb') as f:
+        data = yaml.load(f, Loader=_Loader)
     entries = data.get('internships', []) if isinstance(data, dict) else data
     return data, entries
 
 
+def _compose_node(loader, anchors: dict):
+    """从 loader 的事件流组装下一个节点（与 yaml.Composer 同样的 tag 解析规则）。
+    解析仍在 libyaml 里完成，这里只把事件拼成节点，避开整份文档一次性组装。"""
+    ev = loader.get_event()
+    if isinstance(ev, yaml.AliasEvent):
+        return anchors[ev.anchor]
+    if isinstance(ev, yaml.ScalarEvent):
+        kind, value = yaml.ScalarNode, ev.value
+    elif isinstance(ev, yaml.SequenceStartEvent):
+        kind, value = yaml.SequenceNode, None
+    else:
+        kind, value = yaml.MappingNode, None
+    tag = ev.tag
+    if tag is None or tag == '!':
+        tag = loader.resolve(kind, value, ev.implicit)
+    if kind is yaml.ScalarNode:
+        node = yaml.ScalarNode(tag, value, ev.start_mark, ev.end_mark, ev.style)
+    elif kind is yaml.SequenceNode:
+        node = yaml.SequenceNode(tag, [], ev.start_mark, None, ev.flow_style)
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(_compose_node(loader, anchors))
+        loader.get_event()
+    else:
+        node = yaml.MappingNode(tag, [], ev.start_mark, None, ev.flow_style)
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _compose_node(loader, anchors)
+            node.value.append((key, _compose_node(loader, anchors)))
+        loader.get_event()
+    if ev.anchor is not None:
+        anchors[ev.anchor] = node
+    return node
+
+
+def iter_entries(path: Path):
+    """逐条产出 internships 列表中的条目，凑够即可停止读取（只读路径用）。
+
+    libyaml 的 C loader 只能整份组装文档，这里改用它的事件接口逐个组装、构造列表元素：
+    新条目追加在末尾、pending 多在尾部时也比整份 load_data 快，pending 在开头时更快。
+    结构与 load_data 相同：顶层列表，或 {internships: [...]}。"""
+    with path.open('rb') as f:
+        loader = _Loader(f)
+        anchors: dict = {}
+        try:
+            loader.get_event()  # StreamStart
+            if not loader.check_event(yaml.DocumentStartEvent):
+                return
+            loader.get_event()
+            if loader.check_event(yaml.MappingStartEvent):
+                loader.get_event()
+                while not loader.check_event(yaml.MappingEndEvent):
+                    key = loader.construct_document(_compose_node(loader, anchors))
+                    if key == 'internships' and loader.check_event(yaml.SequenceStartEvent):
+                        break
+                    _compose_node(loader, anchors)  # 跳过其它键的值
+                else:
+                    return
+            if not loader.check_event(yaml.SequenceStartEvent):
+                return
+            loader.get_event()
+            while not loader.check_event(yaml.SequenceEndEvent):
+                yield loader.construct_document(_compose_node(loader, anchors))
+        finally:
+            loader.dispose()
+
+
 def save_data(path: Path, data: dict, entries: list) -> None:
     if isinstance(data, dict):
         data['internships'] = entries
-    path.write_text(
-        yaml.dump(data, allow_unicode=True, default_flow_style=False, sort_keys=False),
-        encoding='utf-8',
-    )
+    # 先写临时文件并落盘，再原子替换：中途崩溃不会留下写了一半的 YAML
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with tmp.open('w', encoding='utf-8') as f:
+        yaml.dump(data, f, Dumper=_Dumper, allow_unicode=True, default_flow_style=False, sort_keys=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# 一次处理会写的字段；逐批追加到 updates 日志，崩溃后按 url 补回
+UPDATE_FIELDS = ('jd_summary', 'tags', 'jd_quality', 'jd_score', 'jd_hash')
+
+
+def updates_log_path(yaml_path: Path) -> Path:
+    return yaml_path.with_name(yaml_path.stem + '.updates.jsonl')
+
+
+def replay_updates(entries: list, log_path: Path) -> int:
+    by_url = {e['url']: e for e in entries if isinstance(e, dict) and e.get('url')}
+    replayed = 0
+    text = log_path.read_text(encoding='utf-8')
+    for line in text.splitlines():
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # 崩溃时写了一半的行
+        entry = by_url.get(rec.get('url')) if isinstance(rec, dict) else None
+        if entry is None:
+            continue
+        entry.update((k, rec[k]) for k in UPDATE_FIELDS if k in rec)
+        replayed += 1
+    if text and not text.endswith('\n'):
+        # --resume 会接着追加：先补上半行的换行，新记录不会接在残行后面
+        with log_path.open('a', encoding='utf-8') as f:
+            f.write('\n')
+    return replayed
 
 
-def get_pending(entries: list, refetch: bool = False) -> list[tuple[int, dict]]:
-    return [
+def jd_hash(entry: dict) -> str:
+    """jd_full 内容指纹；同一公司批量发的岗位常共用一份 JD"""
+    jd = (entry.get('jd_full') or '').strip()
+    return hashlib.blake2b(jd.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def jd_cache_path(yaml_path: Path) -> Path:
+    return yaml_path.with_name('jd_cache.json')
+
+
+def load_jd_cache(path: Path) -> dict[str, dict]:
+    try:
+        cache = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _copy_fields(fields: dict) -> dict:
+    """每个条目各自一份 list（tags）：多个条目共享同一对象时 SafeDumper 会写出 &id001 / *id001 锚点"""
+    return {k: list(v) if isinstance(v, list) else v for k, v in fields.items()}
+
+
+def _has_text(s) -> bool:
+    """非空且不全是空白；不像 .strip() 那样为每个字段拷贝一份字符串"""
+    return bool(s) and not s.isspace()
+
+
+def _jd_changed(entry: dict) -> bool:
+    """摘要生成后 jd_full 又被改过（记录的 jd_hash 对不上）；没记录 jd_hash 的老条目视为未变"""
+    h = entry.get('jd_hash')
+    return bool(h) and h != jd_hash(entry)
+
+
+def get_pending(entries: list, refetch: bool = False, limit: int = 0) -> list[tuple[int, dict]]:
+    pending = (
         (i, e) for i, e in enumerate(entries)
-        if e.get('jd_full', '').strip()
-        and (refetch or not e.get('jd_summary', '').strip())
-    ]
+        if _has_text(e.get('jd_full', ''))
+        and (refetch or not _has_text(e.get('jd_summary', '')) or _jd_changed(e))
+    )
+    # 有 limit 时凑够就停，不再扫描剩余条目
+    return list(islice(pending, limit) if limit > 0 else pending)
 
 
 # ── Prompt builder ─────────────────────────────────────────────────────────────
 
-def build_prompt(batch: list[dict]) -> str:
-    lines = [SYSTEM_PROMPT, '']
-    for i, e in enumerate(batch):
-        lines.append(f'=== 条目 {i} ===')
-        lines.append(f"职位: {e.get('title', '')} @ {e.get('company', '')}")
-        lines.append(f"JD原文:\n{e.get('jd_full', '').strip()}")
-        lines.append('')
-    return '\n'.join(lines)
+def _trim(jd: str, max_chars: int = MAX_JD_CHARS) -> str:
+    """超长 JD 保留开头 2/3、结尾 1/3：职责与技术栈多在开头，任职要求多在结尾"""
+    if max_chars <= 0 or len(jd) <= max_chars:
+        return jd
+    head = max_chars * 2 // 3
+    return f'{jd[:head]}\n…\n{jd[-(max_chars - head):]}'
+
+
+def build_prompt(batch: list[dict], max_jd_chars: int = MAX_JD_CHARS) -> str:
+    # 每条一个 f-string，整段一次 join
+    return '\n'.join([SYSTEM_PROMPT, '', *(
+        f"=== 条目 {i} ===\n"
+        f"职位: {e.get('title', '')} @ {e.get('company', '')}\n"
+        f"JD原文:\n{_trim(e.get('jd_full', '').strip(), max_jd_chars)}\n"
+        for i, e in enumerate(batch)
+    )])
 
 
 # ── Result parser & writer ─────────────────────────────────────────────────────
 
+_DECODER = json.JSONDecoder()
+
+
 def parse_result(text: str) -> list[dict] | None:
-    text = text.strip()
+    # 从 [ 处就地解码，解析到数组结尾即停：不切子串、不从尾部反扫 ]，
+    # 数组前后夹杂的说明文字照样容忍。说明文字里也可能有 [（如「条目 [0] 结果如下」），
+    # 解出来不是非空对象数组就接着试下一个 [
     start = text.find('[')
-    end = text.rfind(']')
-    if start == -1 or end == -1:
-        return None
-    try:
-        return json.loads(text[start:end + 1])
-    except json.JSONDecodeError:
-        return None
+    while start != -1:
+        try:
+            results, _ = _DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            results = None
+        if isinstance(results, list) and results and all(isinstance(r, dict) for r in results):
+            return results
+        start = text.find('[', start + 1)
+    return None
 
 
-def apply_result(entries: list, batch_indices: list[int], results: list[dict]) -> int:
-    updated = 0
+_VALID_Q = frozenset('ABCDF')
+
+
+def apply_result(entries: list, batch_indices: list[int], results: list[dict]) -> set[int]:
+    """把 subagent 结果写回 entries，返回真正写入了新 jd_summary 的条目下标。
+    只有这些条目可以记新的 jd_hash / 进缓存；结果缺失或摘要不合格的条目保持待处理。"""
+    summarized: set[int] = set()
+    n_batch = len(batch_indices)
     for item in results:
+        if not isinstance(item, dict):
+            continue
         idx_in_batch = item.get('id')
-        if idx_in_batch is None or idx_in_batch >= len(batch_indices):
+        if not (isinstance(idx_in_batch, int) and 0 <= idx_in_batch < n_batch):
             continue
-        entry = entries[batch_indices[idx_in_batch]]
+        entry_idx = batch_indices[idx_in_batch]
+        entry = entries[entry_idx]
 
+        # 先把字段取成局部变量并校验，最后一次 update 写回
         summary = (item.get('jd_summary') or '').strip()
-        tags = item.get('tags') or []
+        tags = item.get('tags')
         quality = (item.get('jd_quality') or '').strip().upper()
         score = item.get('jd_score')
 
-        if summary and len(summary) >= 10:
-            entry['jd_summary'] = summary
-        if tags and isinstance(tags, list):
-            entry['tags'] = [str(t).strip() for t in tags if t]
-        if quality in ('A', 'B', 'C', 'D', 'F'):
-            entry['jd_quality'] = quality
-            updated += 1
+        patch = {}
+        if len(summary) >= 10:
+            patch['jd_summary'] = summary
+            summarized.add(entry_idx)
+        if isinstance(tags, list) and tags:
+            # 常见标签（Python/LLM/…）在上千条里反复出现，intern 后共用同一个 str 对象
+            patch['tags'] = [sys.intern(x) for x in (str(t).strip() for t in tags if t) if x]
+        if quality in _VALID_Q:
+            patch['jd_quality'] = quality
         if isinstance(score, int) and 3 <= score <= 9:
-            entry['jd_score'] = score
+            patch['jd_score'] = score
+        entry.update(patch)
 
-        print(f"  [{batch_indices[idx_in_batch]}] {entry.get('company')} | {quality}({score}) | {summary[:40]}")
-    return updated
+        print(f"  [{entry_idx}] {entry.get('company')} | {quality}({score}) | {summary[:40]}")
+    return summarized
 
 
 # ── sessions_spawn via openclaw gateway API ────────────────────────────────────
 
-def spawn_and_wait(task: str, label: str, timeout: int = 180) -> str | None:
-    """
-    Spawn a subagent via openclaw HTTP API and poll for result.
-    Returns the final assistant text, or None on failure.
-    """
-    import urllib.request
-    import urllib.error
+def _gateway_json(conn: http.client.HTTPConnection, method: str, path: str,
+                  payload: dict | None = None) -> dict:
+    body = _dumps(payload) if payload is not None else None
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        return _loads(conn.getresponse().read())
+    except Exception:
+        conn.close()  # 连接状态不可信，下次 request 会自动重连
+        raise
 
-    gateway = 'http://localhost:19000'
 
-    # 1. spawn
-    payload = json.dumps({
-        'task': task,
-        'label': label,
-        'cleanup': 'delete',
-        'mode': 'run',
-        'runTimeoutSeconds': timeout,
-    }).encode()
+def _assistant_text(msg: dict) -> str | None:
+    if msg.get('role') != 'assistant':
+        return None
+    for block in (msg.get('content') or []):
+        if block.get('type') == 'text' and block.get('text', '').strip():
+            return block['text']
+    return None
 
+
+def _sse_text(event: str, data: str) -> str | None:
     try:
-        req = urllib.request.Request(
-            f'{gateway}/api/sessions/spawn',
-            data=payload,
-            headers={'Content-Type': 'application/json'},
-            method='POST',
-        )
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            spawn_data = json.loads(resp.read())
-    except Exception as e:
-        print(f'  spawn error: {e}', file=sys.stderr)
+        msg = _loads(data)
+    except ValueError:
+        return None
+    if not isinstance(msg, dict):
         return None
+    msg = msg.get('message', msg)
+    if event == 'assistant.message':
+        msg = {**msg, 'role': 'assistant'}
+    return _assistant_text(msg)
 
-    session_key = spawn_data.get('childSessionKey')
-    if not session_key:
-        print(f'  no childSessionKey: {spawn_data}', file=sys.stderr)
+
+def _wait_sse(session_key: str, deadline: float) -> str | None:
+    """订阅 gateway 的 session 事件流，收到 assistant 消息即返回其文本。
+    端点不存在（非 200 或不是 text/event-stream）、流提前结束或超时都返回 None，由调用方退回轮询。"""
+    conn = http.client.HTTPConnection(GATEWAY_HOST, GATEWAY_PORT,
+                                      timeout=max(1.0, deadline - time.time()))
+    try:
+        conn.request('GET', f'/api/sessions/{quote(session_key, safe="")}/events',
+                     headers={'Accept': 'text/event-stream'})
+        resp = conn.getresponse()
+        if resp.status != 200 or not resp.getheader('Content-Type', '').startswith('text/event-stream'):
+            return None
+        event, data = '', []
+        for raw in resp:
+            line = raw.decode('utf-8').rstrip('\r\n')
+            if line.startswith('event:'):
+                event = line[6:].strip()
+            elif line.startswith('data:'):
+                data.append(line[5:].removeprefix(' '))
+            elif not line:  # 空行 = 一个事件结束
+                text = _sse_text(event, '\n'.join(data)) if data else None
+                if text:
+                    return text
+                event, data = '', []
+            if time.time() > deadline:
+                return None
         return None
+    except Exception:
+        return None
+    finally:
+        conn.close()
 
-    print(f'  spawned: {session_key}')
 
-    # 2. poll history until assistant reply appears
-    deadline = time.time() + timeout
-    last_seen = 0
-    while time.time() < deadline:
-        time.sleep(4)
+def spawn_and_wait(task: str, label: str, timeout: int = 180,
+                   poll_start: float = 0.5, use_sse: bool = False) -> str | None:
+    """
+    Spawn a subagent via openclaw HTTP API and wait for its result.
+    With use_sse, subscribe to the session event stream first; otherwise (or if
+    the stream is unavailable) poll history, starting every poll_start seconds
+    and backing off ×1.5 up to POLL_INTERVAL_MAX.
+    Returns the final assistant text, or None on failure.
+    """
+    # spawn 和每次轮询复用同一条 keep-alive 连接，不再每 4 秒重新建连
+    conn = http.client.HTTPConnection(GATEWAY_HOST, GATEWAY_PORT, timeout=10)
+    try:
+        # 1. spawn
         try:
-            req = urllib.request.Request(
-                f'{gateway}/api/sessions/{urllib.parse.quote(session_key, safe="")}/history?limit=20',
-                method='GET',
-            )
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                hist = json.loads(resp.read())
-        except Exception:
-            continue
-
-        messages = hist.get('messages', [])
-        for msg in reversed(messages):
-            if msg.get('role') == 'assistant':
-                for block in (msg.get('content') or []):
-                    if block.get('type') == 'text' and block.get('text', '').strip():
-                        return block['text']
-    return None
+            spawn_data = _gateway_json(conn, 'POST', '/api/sessions/spawn', {
+                'task': task,
+                'label': label,
+                'cleanup': 'delete',
+                'mode': 'run',
+                'runTimeoutSeconds': timeout,
+            })
+        except Exception as e:
+            print(f'  spawn error: {e}', file=sys.stderr)
+            return None
+
+        session_key = spawn_data.get('childSessionKey')
+        if not session_key:
+            print(f'  no childSessionKey: {spawn_data}', file=sys.stderr)
+            return None
+
+        print(f'  spawned: {session_key}')
+        deadline = time.time() + timeout
+
+        # 2a. 事件流：完成即唤醒，没有空轮询
+        if use_sse:
+            text = _wait_sse(session_key, deadline)
+            if text:
+                print(f'  {session_key}: reply via SSE')
+                return text
+            print(f'  {session_key}: SSE unavailable, falling back to polling')
+            conn.close()  # 等事件流期间 keep-alive 连接可能已被 gateway 回收，下次请求重连
+
+        # 2b. poll history until assistant reply appears
+        history_path = f'/api/sessions/{quote(session_key, safe="")}/history?limit=20'
+        # 短任务很快就能取到结果；长任务轮询逐步变稀，不白白消耗请求。
+        # 事件流落空时可能已耗到 deadline，但回复也许早已写进 history：先立即查一次
+        interval = poll_start
+        check_now = use_sse
+        while check_now or time.time() < deadline:
+            if not check_now:
+                time.sleep(interval)
+                interval = min(interval * 1.5, POLL_INTERVAL_MAX)
+            check_now = False
+            try:
+                hist = _gateway_json(conn, 'GET', history_path)
+            except Exception:
+                continue
+
+            for msg in reversed(hist.get('messages', [])):
+                text = _assistant_text(msg)
+                if text:
+                    return text
+        return None
+    finally:
+        conn.close()
 
 
 # ── Main ───────────────────────────────────────────────────────────────────────
 
 def main():
-    import urllib.parse  # noqa: F401 — needed by spawn_and_wait
-
     ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
     ap.add_argument('--yaml', type=Path, default=YAML_PATH)
     ap.add_argument('--limit', type=int, default=0, help='Max entries to process (0=all)')
     ap.add_argument('--refetch', action='store_true', help='Re-process entries that already have summary')
+    ap.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Entries per subagent')
+    ap.add_argument('--concurrency', type=int, default=CONCURRENCY, help='Subagents running at once')
+    ap.add_argument('--max-jd-chars', type=int, default=MAX_JD_CHARS,
+                    help='Trim each JD to this many chars (head + tail) in the prompt (0=no limit)')
     ap.add_argument('--list-pending', action='store_true')
     ap.add_argument('--dry-run', action='store_true', help='Print prompt without spawning')
     ap.add_argument('--write-result', type=str, help='JSON string to write back results')
+    ap.add_argument('--poll-interval-start', type=float, default=0.5,
+                    help=f'Initial history poll interval in seconds (backs off to {POLL_INTERVAL_MAX:g}s)')
+    ap.add_argument('--use-sse', action='store_true',
+                    help='Wait on the gateway session event stream (falls back to polling)')
+    ap.add_argument('--resume', action='store_true',
+                    help='Replay results logged by an interrupted run before processing')
     args = ap.parse_args()
-
-    data, entries = load_data(args.yaml)
-    pending = get_pending(entries, args.refetch)
-    if args.limit > 0:
-        pending = pending[:args.limit]
+    args.batch_size = max(1, args.batch_size)  # 与 --concurrency 一样，< 1 按 1 处理
+
+    log_path = updates_log_path(args.yaml)
+    recovered = 0
+    read_only = args.list_pending or (args.dry_run and args.write_result is None)
+    # 只读且只要前 N 条：边解析边筛，凑够即停，不整份组装 YAML。
+    # 没有 libyaml 时逐事件组装反而比整份加载慢，仍走全量路径
+    if read_only and args.limit > 0 and not args.resume and _Loader is not yaml.SafeLoader:
+        pending = get_pending(iter_entries(args.yaml), args.refetch, args.limit)
+    else:
+        data, entries = load_data(args.yaml)
+        if args.resume and log_path.exists():
+            recovered = replay_updates(entries, log_path)
+            print(f'recovered={recovered} from {log_path.name}')
+        pending = get_pending(entries, args.refetch, args.limit)
 
     # ── list-pending ──
     if args.list_pending:
@@ -273,42 +561,116 @@ def main():
         if not results:
             print('Failed to parse result JSON', file=sys.stderr)
             sys.exit(1)
-        apply_result(entries, batch_indices, results)
+        for i in apply_result(entries, batch_indices, results):
+            entries[i]['jd_hash'] = jd_hash(entries[i])
         save_data(args.yaml, data, entries)
+        if recovered:
+            log_path.unlink(missing_ok=True)
         return
 
     # ── dry-run: print full prompt ──
     if args.dry_run:
         batch_entries = [e for _, e in pending]
-        print(build_prompt(batch_entries))
+        print(build_prompt(batch_entries, args.max_jd_chars))
         return
 
-    # ── main loop: single batch, one subagent ──
+    # ── main loop: batches run concurrently, one subagent each ──
     if not pending:
+        if recovered:
+            save_data(args.yaml, data, entries)
+            log_path.unlink(missing_ok=True)
         print('No pending entries.')
         return
 
     total = len(pending)
-    batch_indices = [i for i, _ in pending]
-    batch_entries = [e for _, e in pending]
-
-    print(f'Total pending: {total} | Spawning single subagent for all entries.')
-    prompt = build_prompt(batch_entries)
-
-    result_text = spawn_and_wait(prompt, label='summarize-jds')
-    if not result_text:
-        print('Subagent failed or timed out.', file=sys.stderr)
-        sys.exit(1)
-
-    results = parse_result(result_text)
-    if not results:
-        print(f'Unparseable JSON:\n{result_text[:300]}', file=sys.stderr)
+    # 相同 JD 只问一次：按 jd_full 指纹分组，命中缓存的整组直接套用；
+    # 其余每组只派代表条目给 subagent，结果再广播给组内其他条目
+    cache_path = jd_cache_path(args.yaml)
+    cache = load_jd_cache(cache_path)
+    groups: dict[str, list[tuple[int, dict]]] = {}
+    for i, e in pending:
+        groups.setdefault(jd_hash(e), []).append((i, e))
+    shared = 0
+    reps: list[tuple[int, dict]] = []
+    rep_hash: dict[int, str] = {}
+    for h, members in groups.items():
+        if h in cache and not args.refetch:
+            for _, e in members:
+                e.update(_copy_fields(cache[h]))
+                e['jd_hash'] = h
+            shared += len(members)
+        else:
+            reps.append(members[0])
+            rep_hash[members[0][0]] = h
+
+    batches = [reps[i:i + args.batch_size] for i in range(0, len(reps), args.batch_size)]
+    print(f'Total pending: {total} | {len(reps)} unique JDs to summarize '
+          f'({total - len(reps) - shared} duplicates, {shared} from {cache_path.name}) | '
+          f'{len(batches)} batches, up to {args.concurrency} subagents at once.')
+
+    lock = threading.Lock()  # apply_result 改的是共享的 entries / cache
+
+    def run_batch(n: int, batch: list[tuple[int, dict]]) -> int | None:
+        nonlocal shared
+        prompt = build_prompt([e for _, e in batch], args.max_jd_chars)
+        result_text = spawn_and_wait(prompt, label=f'summarize-jds-{n}',
+                                     poll_start=args.poll_interval_start,
+                                     use_sse=args.use_sse)
+        if not result_text:
+            print(f'  batch {n}: subagent failed or timed out.', file=sys.stderr)
+            return None
+        results = parse_result(result_text)
+        if not results:
+            print(f'  batch {n}: unparseable JSON:\n{result_text[:300]}', file=sys.stderr)
+            return None
+        with lock:
+            summarized = apply_result(entries, [i for i, _ in batch], results)
+            for i, e in batch:
+                h = rep_hash[i]
+                members = groups[h]
+                # 没拿到新摘要的条目不记 hash、不进缓存、不广播，下次仍是 pending
+                if i in summarized:
+                    e['jd_hash'] = h  # 记下摘要对应的 JD 版本
+                    fields = {k: e[k] for k in UPDATE_FIELDS if k in e}
+                    cache[h] = _copy_fields(fields)
+                    for _, dup in members[1:]:
+                        dup.update(_copy_fields(fields))
+                    shared += len(members) - 1
+                for _, m in members:
+                    if m.get('url'):
+                        rec = {'url': m['url'], **{k: m[k] for k in UPDATE_FIELDS if k in m}}
+                        log.write(json.dumps(rec, ensure_ascii=False) + '\n')
+            log.flush()
+        return len(summarized)
+
+    if log_path.exists() and not args.resume:
+        print(f'discarding {log_path.name} from an earlier run (use --resume to replay it)')
+    updated = failed = 0
+    # 每批结果边跑边追加到日志；正常结束写回 YAML 后删除
+    with log_path.open('a' if args.resume else 'w', encoding='utf-8') as log, \
+            ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as ex:
+        futures = {ex.submit(run_batch, n, b): n for n, b in enumerate(batches)}
+        for fut in as_completed(futures):
+            try:
+                n_updated = fut.result()
+            except Exception as e:  # 单批出错只算这一批失败，其余批次的结果照常写回
+                print(f'  batch {futures[fut]}: {e!r}', file=sys.stderr)
+                n_updated = None
+            if n_updated is None:
+                failed += 1
+            else:
+                updated += n_updated
+
+    # 所有批次结束后只写一次 YAML
+    if recovered or shared or failed < len(batches):
+        save_data(args.yaml, data, entries)
+        cache_path.write_text(json.dumps(cache, ensure_ascii=False), encoding='utf-8')
+    log_path.unlink(missing_ok=True)
+    print(f'\nDone. Updated {updated}/{len(reps)} via subagents, {shared} shared from identical JDs'
+          + (f' | {failed}/{len(batches)} batches failed' if failed else ''))
+    if failed:
         sys.exit(1)
 
-    updated = apply_result(entries, batch_indices, results)
-    save_data(args.yaml, data, entries)
-    print(f'\nDone. Updated {updated}/{total}')
-
 
 if __name__ == '__main__':
     main()